@@ -4,8 +4,20 @@ from typing import Optional, List, Any
 import marketplace
 import asyncio
 import functools
+from dashboard import WatchDashboard
+from seller_index import SellerIndex
 
-def setup(tree: app_commands.CommandTree, client: discord.Client, db: Any, api_key: str):
+# /sellers の1出品者あたりの出品一覧の最大文字数 (10件分でEmbed全体の上限に収まる長さ)
+SELLER_STOCK_LIMIT = 450
+
+def setup(
+    tree: app_commands.CommandTree,
+    client: discord.Client,
+    db: Any,
+    api_key: str,
+    dashboard: Optional[WatchDashboard] = None,
+    seller_index: Optional[SellerIndex] = None
+):
 
     @tree.command(name="price", description="アイテムの最安値を検索します")
     @app_commands.describe(item_name="検索するアイテム名")
@@ -109,7 +121,7 @@ def setup(tree: app_commands.CommandTree, client: discord.Client, db: Any, api_k
 
     @tree.command(name="watchlist", description="監視中のアイテム一覧を表示します")
     async def watchlist(interaction: Interaction):
-        watches = db.get_all_watches()
+        watches = db.get_watches_with_names()
 
         if not watches:
             await interaction.response.send_message("現在監視中のアイテムはありません。", ephemeral=True)
@@ -117,8 +129,54 @@ def setup(tree: app_commands.CommandTree, client: discord.Client, db: Any, api_k
 
         embed = Embed(title="監視リスト", color=Color.blue())
 
-        for item_id, threshold in watches:
-            item_name = db.get_item_name(item_id) or f"Unknown Item (ID: {item_id})"
+        for item_id, threshold, item_name in watches:
+            item_name = item_name or f"Unknown Item (ID: {item_id})"
             embed.add_field(name=item_name, value=f"${threshold:,}")
         
         await interaction.response.send_message(embed=embed)
+
+    if seller_index is not None:
+        @tree.command(name="sellers", description="目標価格以下での出品を繰り返している出品者を表示します")
+        @app_commands.describe(min_count="最低出品回数")
+        async def sellers(interaction: Interaction, min_count: app_commands.Range[int, 1] = 2):
+            repeaters = seller_index.repeat_underpricers(min_count)[:10]
+
+            if not repeaters:
+                await interaction.response.send_message("該当する出品者はいません。", ephemeral=True)
+                return
+
+            item_names = {item_id: name for item_id, _, name in db.get_watches_with_names()}
+
+            embed = Embed(title="割安出品の多い出品者", color=Color.orange())
+            for seller in repeaters:
+                # フィールドの値は1024文字、Embed全体は6000文字までのため、出品一覧は途中で省略する
+                entries = [f"{item_names.get(l.item_id) or l.item_id} ${l.price:,}" for l in seller.listings.values()]
+                stock = ""
+                for i, entry in enumerate(entries):
+                    if len(stock) + len(entry) + 2 > SELLER_STOCK_LIMIT:
+                        stock += f" …他 {len(entries) - i} 件"
+                        break
+                    stock += (", " if stock else "") + entry
+                stock = stock or "現在出品なし"
+                embed.add_field(
+                    name=f"{seller.player_name} [{seller.player_id}] - {seller.below_threshold_count}回",
+                    value=f"{stock}\n最終: <t:{seller.last_below_threshold_at}:R>",
+                    inline=False
+                )
+
+            await interaction.response.send_message(embed=embed)
+
+    if dashboard is not None:
+        @tree.command(name="dashboard", description="このチャンネルに監視ダッシュボードを設置します")
+        async def dashboard_command(interaction: Interaction):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("このコマンドを実行する権限がありません。", ephemeral=True)
+                return
+
+            await interaction.response.defer(ephemeral=True)
+            try:
+                await dashboard.create(interaction.channel)
+            except discord.HTTPException as e:
+                await interaction.followup.send(f"ダッシュボードを設置できませんでした: {e}", ephemeral=True)
+                return
+            await interaction.followup.send("監視ダッシュボードを設置しました。最新の価格で自動更新されます。", ephemeral=True)
@@ -0,0 +1,144 @@
+import discord
+from discord import Embed, Color
+from typing import Any, Dict, Optional
+import json
+import time
+from price_api import PriceCache
+
+# bot_config に保存するキー (値は {channel_id: message_id} のJSON)
+DASHBOARD_CONFIG_KEY = "dashboard_messages"
+
+DESCRIPTION_LIMIT = 4000
+
+# データ経過時間は段階でのみ表示する (秒, 表示)。取得時刻そのものを表示すると
+# ポーリングのたびに描画内容が変わり、毎回メッセージを編集することになる
+STALENESS_LEVELS = [
+    (3600, "⚠️ 1時間以上更新なし"),
+    (600, "⚠️ 10分以上更新なし"),
+]
+
+def staleness_label(age: float) -> str:
+    for limit, label in STALENESS_LEVELS:
+        if age >= limit:
+            return label
+    return "最新"
+
+class WatchDashboard:
+    """チャンネルごとに固定した監視リストのダッシュボードメッセージを管理する
+
+    描画は監視ループのキャッシュ (PriceCache) とDBへの1回のクエリのみで行い、
+    上流APIにはアクセスしない。内容 (目標価格・最安値・鮮度の段階) が前回と同じ場合は
+    メッセージを編集しない。
+    """
+
+    def __init__(self, client: discord.Client, db: Any, cache: PriceCache):
+        self.client = client
+        self.db = db
+        self.cache = cache
+        # channel_id -> 最後に反映した描画内容
+        self._rendered: Dict[int, str] = {}
+
+    def _load_messages(self) -> Dict[int, int]:
+        raw = self.db.get_config(DASHBOARD_CONFIG_KEY)
+        if not raw:
+            return {}
+        try:
+            return {int(k): int(v) for k, v in json.loads(raw).items()}
+        except (ValueError, AttributeError):
+            return {}
+
+    def _save_messages(self, messages: Dict[int, int]):
+        self.db.set_config(DASHBOARD_CONFIG_KEY, json.dumps({str(k): v for k, v in messages.items()}))
+
+    def render(self, now: Optional[float] = None) -> Embed:
+        """現在のキャッシュからダッシュボードのEmbedを作成する"""
+        if now is None:
+            now = time.time()
+
+        watches = self.db.get_watches_with_names()
+        snapshots = self.cache.get_many([item_id for item_id, _, _ in watches])
+
+        lines = []
+        for item_id, threshold, name in watches:
+            name = name or f"Unknown Item (ID: {item_id})"
+            snapshot = snapshots.get(item_id)
+            cheapest = snapshot.cheapest if snapshot else None
+
+            if not cheapest:
+                lines.append(f"⚪ **{name}** 目標 ${threshold:,} / 最安値 - (データなし)")
+                continue
+
+            distance = cheapest.price - threshold
+            mark = "🟢" if distance <= 0 else "🔴"
+            lines.append(
+                f"{mark} **{name}** 目標 ${threshold:,} / 最安値 ${cheapest.price:,} "
+                f"(差 {'+' if distance > 0 else '-'}${abs(distance):,}) {staleness_label(now - snapshot.fetched_at)}"
+            )
+
+        description = ""
+        for i, line in enumerate(lines):
+            if len(description) + len(line) + 1 > DESCRIPTION_LIMIT:
+                description += f"…他 {len(lines) - i} 件"
+                break
+            description += line + "\n"
+
+        embed = Embed(title="監視ダッシュボード", color=Color.blue())
+        embed.description = description or "現在監視中のアイテムはありません。"
+        embed.set_footer(text=f"監視中: {len(watches)} 件")
+        return embed
+
+    async def create(self, channel: discord.abc.Messageable) -> discord.Message:
+        """チャンネルにダッシュボードを投稿してピン留めする (既存のものは削除)"""
+        embed = self.render()
+        message = await channel.send(embed=embed)
+
+        try:
+            await message.pin()
+        except discord.HTTPException as e:
+            print(f"ダッシュボードのピン留めに失敗しました: {e}")
+
+        messages = self._load_messages()
+        old_message_id = messages.get(channel.id)
+        if old_message_id:
+            try:
+                await channel.get_partial_message(old_message_id).delete()
+            except discord.HTTPException:
+                pass
+
+        messages[channel.id] = message.id
+        self._save_messages(messages)
+        self._rendered[channel.id] = json.dumps(embed.to_dict(), sort_keys=True)
+        return message
+
+    async def refresh(self):
+        """内容が変わったダッシュボードのみ編集する"""
+        messages = self._load_messages()
+        if not messages:
+            return
+
+        embed = self.render()
+        rendered = json.dumps(embed.to_dict(), sort_keys=True)
+        removed = False
+
+        for channel_id, message_id in list(messages.items()):
+            if self._rendered.get(channel_id) == rendered:
+                continue
+
+            channel = self.client.get_channel(channel_id)
+            if channel is None:
+                continue
+
+            try:
+                # PartialMessage を使い、編集前の取得リクエストを省く
+                await channel.get_partial_message(message_id).edit(embed=embed)
+                self._rendered[channel_id] = rendered
+            except discord.NotFound:
+                # メッセージが削除された場合は管理対象から外す
+                del messages[channel_id]
+                self._rendered.pop(channel_id, None)
+                removed = True
+            except discord.HTTPException as e:
+                print(f"ダッシュボード(チャンネルID: {channel_id})の更新に失敗しました: {e}")
+
+        if removed:
+            self._save_messages(messages)
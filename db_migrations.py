@@ -0,0 +1,78 @@
+import os
+import re
+import time
+from typing import Any, List, Tuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+_MIGRATION_FILE = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+def list_migrations(backend: str) -> List[Tuple[int, str, str]]:
+    """Returns (version, name, path) for every script of the backend, ordered by version."""
+    backend_dir = os.path.join(MIGRATIONS_DIR, backend)
+    migrations = []
+    for file_name in os.listdir(backend_dir):
+        match = _MIGRATION_FILE.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(backend_dir, file_name)))
+    migrations.sort()
+    return migrations
+
+def split_statements(sql_script: str) -> List[str]:
+    """Splits a script into statements, dropping '--' comment lines."""
+    lines = [line for line in sql_script.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(lines).split(';') if s.strip()]
+
+def run_migrations(conn: Any, backend: str, placeholder: str) -> List[int]:
+    """Applies every pending migration and returns the versions applied.
+
+    `conn` is a DB-API connection (sqlite3 or PyMySQL) and `placeholder` its
+    parameter marker ('?' or '%s'). Each migration is recorded in
+    schema_version in the same commit as its statements. On SQLite the
+    migration runs inside an explicit BEGIN, so a failure rolls back its DDL
+    too. MySQL commits DDL implicitly, so MySQL scripts should be safe to
+    re-run up to their last statement.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at BIGINT NOT NULL
+            )
+        """)
+        conn.commit()
+
+        cursor.execute("SELECT version FROM schema_version")
+        applied_versions = {row[0] for row in cursor.fetchall()}
+
+        applied = []
+        for version, name, path in list_migrations(backend):
+            if version in applied_versions:
+                continue
+
+            with open(path, 'r', encoding='utf-8') as f:
+                statements = split_statements(f.read())
+
+            try:
+                if backend == 'sqlite':
+                    # sqlite3 はDDLを自動でトランザクションに含めないため明示的に開始する
+                    cursor.execute("BEGIN")
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    f"INSERT INTO schema_version (version, name, applied_at) VALUES ({placeholder}, {placeholder}, {placeholder})",
+                    (version, name, int(time.time()))
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            print(f"[DB] マイグレーション {version:04d}_{name} を適用しました。")
+            applied.append(version)
+
+        return applied
+    finally:
+        cursor.close()
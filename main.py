@@ -1,9 +1,13 @@
 import discord
-from discord import app_commands, Embed, Color
+from discord import app_commands
 from discord.ext import tasks
 import config
 import bot_commands
 import marketplace
+from price_api import PriceCache, PriceAPIServer
+from dashboard import WatchDashboard
+from seller_index import SellerIndex
+from pipeline import WatchPipeline, LoopLagGuard, FetchResult, UniqueKey
 from sqlite_client import SQLiteClient
 try:
     from mysql_client import MySQLClient
@@ -44,14 +48,41 @@ try:
 except AttributeError:
     API_KEY = marketplace.TORN_API_KEY
 
-UniqueKey = tuple[int, int, int, int, str]
-
 # 通知済みアイテムのキャッシュ
 # Key: (item_id, player_id, price, quantity, source)
 # Value: timestamp
 notified_listings: dict[UniqueKey, float] = {}
 CACHE_TTL = 600
 
+# 優先アイテムは通常アイテムをこの件数チェックするごとに再チェックする
+BOOST_EVERY = 3
+
+# 監視ループで取得した最新の出品情報 (ローカル価格APIから参照)
+price_cache = PriceCache()
+price_api_server = None
+
+price_api_conf = getattr(config, "PriceApi", None)
+if price_api_conf and getattr(price_api_conf, "Enabled", False):
+    price_api_server = PriceAPIServer(
+        price_cache,
+        db,
+        host=getattr(price_api_conf, "Host", "127.0.0.1"),
+        port=getattr(price_api_conf, "Port", 8765)
+    )
+
+dashboard = WatchDashboard(client, db, price_cache)
+
+# 出品者ごとの出品と割安出品の回数 (DBに保存し、起動時に復元)
+seller_index = SellerIndex(db)
+seller_index.load()
+
+# 取得結果の評価 (マージ・最安値・重複判定・Embed作成) はワーカースレッドで行う
+watch_pipeline = WatchPipeline(price_cache, seller_index)
+
+# イベントループの遅延がこの秒数を超えている間は低優先度の処理を延期する
+LAG_BUDGET = 0.25
+lag_guard = LoopLagGuard(budget=LAG_BUDGET)
+
 @tasks.loop(seconds=5)
 async def check_market():
     global notified_listings
@@ -79,84 +110,110 @@ async def check_market():
     for k in keys_to_remove:
         del notified_listings[k]
 
-    watches = db.get_all_watches()
+    # 割安出品を繰り返す出品者が出品しているアイテムは、通常アイテムの間にも挟んで頻繁にチェックする
+    # watches: [(item_id, threshold, name), ...] (アイテム名も1回のクエリで取得)
+    watches, boosted = seller_index.prioritize(db.get_watches_with_names(), every=BOOST_EVERY)
 
-    # watches is List[Tuple[int, int]] -> [(item_id, threshold), ...]
     loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def send_alerts():
+        async for batch in watch_pipeline.batches(queue):
+            alerts = await watch_pipeline.evaluate(batch, notified_listings.keys())
+            for alert in alerts:
+                # 評価中に同じ出品を通知済みになっている場合がある
+                if alert.unique_key in notified_listings:
+                    continue
+                try:
+                    await channel.send(embed=alert.embed)
+                except Exception as e:
+                    print(f"通知の送信中にエラーが発生しました: {e}")
+                    continue
+                notified_listings[alert.unique_key] = time.time()
 
-    for item_id, threshold in watches:
-        # APIコール待機 (レート制限考慮)
-        await asyncio.sleep(5)
-
-        try:
-            # 非同期でデータを取得
-            fetch_bazaar = functools.partial(marketplace.fetch_bazaar_data, item_id)
-            fetch_market = functools.partial(marketplace.fetch_item_market_data, item_id, API_KEY)
-
-            bazaar_data, market_listings = await asyncio.gather(
-                loop.run_in_executor(None, fetch_bazaar),
-                loop.run_in_executor(None, fetch_market)
-            )
+    consumer = asyncio.create_task(send_alerts())
+    shed = 0
 
-            bazaar_listings = bazaar_data.listings if bazaar_data else []
-            all_listings = bazaar_listings + market_listings
+    try:
+        for item_id, threshold, item_name in watches:
+            if item_id not in boosted:
+                # 一度待っても遅延が回復しなかった周では、残りの低優先度アイテムは取得しない
+                # (次の周で再度チェックする)
+                if shed:
+                    shed += 1
+                    continue
+                # ループが詰まっている間は低優先度アイテムの取得を待たせる
+                if lag_guard.overloaded and not await lag_guard.wait_until_healthy(max_wait=30):
+                    shed += 1
+                    continue
 
-            if not all_listings:
-                continue
+            # APIコール待機 (レート制限考慮)
+            await asyncio.sleep(5)
 
-            cheapest = min(all_listings, key=lambda x: x.price)
+            try:
+                # 非同期でデータを取得
+                fetch_bazaar = functools.partial(marketplace.fetch_bazaar_data, item_id)
+                fetch_market = functools.partial(marketplace.fetch_item_market_data, item_id, API_KEY)
 
-            if cheapest.price <= threshold:
-                unique_key = (
-                    cheapest.item_id,
-                    cheapest.player_id,
-                    cheapest.price,
-                    cheapest.quantity,
-                    cheapest.source
+                bazaar_data, market_listings = await asyncio.gather(
+                    loop.run_in_executor(None, fetch_bazaar),
+                    loop.run_in_executor(None, fetch_market)
                 )
+            except Exception as e:
+                print(f"Error checking item {item_id}: {e}")
+                continue
 
-                if unique_key in notified_listings:
-                    continue
+            queue.put_nowait(FetchResult(
+                item_id,
+                threshold,
+                item_name or f"Item {item_id}",
+                bazaar_data,
+                market_listings
+            ))
+    finally:
+        queue.put_nowait(None)
+        await consumer
+
+    if shed:
+        print(f"イベントループの遅延のため、{shed} 件のチェックを次の周に回しました。")
+
+@tasks.loop(seconds=60)
+async def update_dashboards():
+    # 編集は最短でもループ間隔ごと、かつ描画内容が変わった場合のみ
+    # ループが詰まっている間は次の周期まで延期する
+    if lag_guard.overloaded:
+        return
 
-                # 通知
-                item_name = db.get_item_name(item_id) or f"Item {item_id}"
-
-                embed = Embed(title=f"Price Alert: {item_name}", color=Color.red())
-                embed.description = f"${cheapest.price:,} x {cheapest.quantity:,}"
-                embed.add_field(name="目標価格", value=f"${threshold:,}", inline=True)
-                embed.add_field(name="最安値", value=f"${cheapest.price:,}", inline=True)
-                embed.add_field(name="出品者", value=cheapest.player_name, inline=False)
-                embed.add_field(name="数量", value=f"{cheapest.quantity:,}", inline=True)
-                embed.add_field(name="差額", value=f"${threshold - cheapest.price:,}", inline=True)
-                if cheapest.source in ['ItemMarket', 'Bazaar']:
-                    if cheapest.source == 'ItemMarket':
-                        source_url = f"https://www.torn.com/page.php?sid=ItemMarket#/market/view=search&itemID={cheapest.item_id}"
-                    else:
-                        source_url = f"https://www.torn.com/bazaar.php?userId={cheapest.player_id}&itemId={cheapest.item_id}&highlight=1#/"
-                    embed.add_field(name="URL", value=source_url, inline=False)
-
-                await channel.send(embed=embed)
-                
-                notified_listings[unique_key] = current_time
-
-        except Exception as e:
-            print(f"Error checking item {item_id}: {e}")
-            continue
+    try:
+        await dashboard.refresh()
+    except Exception as e:
+        print(f"ダッシュボードの更新中にエラーが発生しました: {e}")
 
 @client.event
 async def on_ready():
     print(f'"{client.user}" としてログインしました')
 
-    bot_commands.setup(tree, client, db, API_KEY)
+    bot_commands.setup(tree, client, db, API_KEY, dashboard, seller_index)
     try:
         await tree.sync()
         print("スラッシュコマンドを同期しました。")
     except Exception as e:
         print(f"コマンドの同期中にエラーが発生しました: {e}")
 
+    lag_guard.start()
+
+    if price_api_server:
+        try:
+            price_api_server.start()
+        except OSError as e:
+            print(f"価格APIの起動に失敗しました: {e}")
+
     if not check_market.is_running():
         check_market.start()
 
+    if not update_dashboards.is_running():
+        update_dashboards.start()
+
 @client.event
 async def on_message(message: discord.Message):
     if message.author == client.user:
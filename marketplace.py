@@ -1,6 +1,15 @@
 import requests
 import cloudscraper
-from typing import List, Optional, Union, Dict
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Optional, Union, Dict, Iterable, Iterator, Any, Set, TextIO
 
 TORN_API_KEY = "TORN_API_KEY"
 
@@ -60,6 +69,19 @@ class Listing:
             source="ItemMarket"
         )
 
+    def to_dict(self) -> dict[str, Union[str, int]]:
+        """JSON出力用の辞書に変換する"""
+        return {
+            "item_id": self.item_id,
+            "player_id": self.player_id,
+            "player_name": self.player_name,
+            "price": self.price,
+            "quantity": self.quantity,
+            "source": self.source,
+            "content_updated": self.content_updated,
+            "last_checked": self.last_checked
+        }
+
 class MarketResponse:
     """Bazaar APIレスポンス全体を表すクラス"""
 
@@ -178,45 +200,245 @@ def fetch_all_items(api_key: str) -> Dict[int, str]:
         print(f"[Items] 全アイテム取得中にエラー: {e}")
         return {}
 
-def print_merged_listings(listings: List[Listing], item_name: str, count: int = 20) -> None:
+def print_merged_listings(listings: List[Listing], item_name: str, count: int = 20, file: Optional[TextIO] = None) -> None:
     """統合された出品情報を表示する"""
-    print(f"\n=== {item_name} の統合出品情報 (価格順) ===")
-    print(f"{'ソース':<12} {'価格':<10} {'数量':<10} {'プレイヤー名':<20} {'更新/詳細'}")
-    print("-" * 80)
+    print(f"\n=== {item_name} の統合出品情報 (価格順) ===", file=file)
+    print(f"{'ソース':<12} {'価格':<10} {'数量':<10} {'プレイヤー名':<20} {'更新/詳細'}", file=file)
+    print("-" * 80, file=file)
 
     for listing in listings[:count]:
         time_info = listing.content_updated_relative if listing.content_updated_relative else "-"
-        print(f"{listing.source:<12} {listing.price:<10} {listing.quantity:<10} {listing.player_name:<20} {time_info}")
-    print("-" * 80)
-
-def main() -> None:
-    # アイテムID 196 (Cannabis)
-    target_item_id: int = 196
-
-    # 1. Bazaar情報の取得
-    bazaar_data = fetch_bazaar_data(target_item_id)
-    bazaar_listings = bazaar_data.listings if bazaar_data else []
-    item_name = bazaar_data.item_name if bazaar_data else f"Item {target_item_id}"
-
-    # 2. Item Market情報の取得
-    market_listings = fetch_item_market_data(target_item_id, TORN_API_KEY)
-
-    # 3. リストの統合
-    all_listings = bazaar_listings + market_listings
-
-    if not all_listings:
-        print("出品情報が見つかりませんでした。")
-        return
-
-    # 4. 価格順にソート (安い順)
+        print(f"{listing.source:<12} {listing.price:<10} {listing.quantity:<10} {listing.player_name:<20} {time_info}", file=file)
+    print("-" * 80, file=file)
+
+class RateLimiter:
+    """複数スレッドから共有できる単純なレートリミッター (一定間隔でリクエストを許可)"""
+
+    def __init__(self, per_minute: float):
+        self.interval: float = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: float = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+CSV_FIELDS = [
+    "item_id", "item_name", "fetched_at",
+    "cheapest_price", "cheapest_quantity", "cheapest_source", "cheapest_player_id",
+    "listings", "quantity", "error"
+]
+
+def iter_item_specs(sources: Iterable[Iterable[str]]) -> Iterator[str]:
+    """入力 (ファイル/標準入力/引数) からアイテム指定を1件ずつ返す
+
+    空行と '#' で始まる行は無視する。
+    """
+    for source in sources:
+        for line in source:
+            spec = line.strip()
+            if spec and not spec.startswith("#"):
+                yield spec
+
+def scan_item(
+    item_id: int,
+    api_key: str,
+    bazaar_limiter: RateLimiter,
+    market_limiter: RateLimiter,
+    item_name: Optional[str] = None,
+    listing_limit: int = 20
+) -> Dict[str, Any]:
+    """1アイテム分のBazaar/Item Marketを取得し、出力用の辞書を返す"""
+    bazaar_limiter.wait()
+    bazaar_data = fetch_bazaar_data(item_id)
+
+    market_listings: List[Listing] = []
+    if api_key and api_key != TORN_API_KEY:
+        market_limiter.wait()
+        market_listings = fetch_item_market_data(item_id, api_key)
+
+    all_listings = (bazaar_data.listings if bazaar_data else []) + market_listings
     all_listings.sort(key=lambda x: x.price)
 
-    # 5. 結果の表示
-    print_merged_listings(all_listings, item_name, count=20)
+    if bazaar_data:
+        item_name = bazaar_data.item_name
+
+    cheapest = all_listings[0] if all_listings else None
+    return {
+        "item_id": item_id,
+        "item_name": item_name or f"Item {item_id}",
+        "fetched_at": int(time.time()),
+        "cheapest": cheapest.to_dict() if cheapest else None,
+        "depth": {
+            "listings": len(all_listings),
+            "quantity": sum(x.quantity for x in all_listings)
+        },
+        # table出力の「更新/詳細」列でも使うため、相対時刻も含める
+        "listings": [
+            dict(x.to_dict(), content_updated_relative=x.content_updated_relative)
+            for x in all_listings[:listing_limit]
+        ],
+        # Item Market だけ取得できた場合も cheapest / depth は不完全なので、失敗として報告する
+        "error": None if bazaar_data else "bazaar unavailable"
+    }
+
+class ResultWriter:
+    """結果を1件ずつ書き出す (jsonl / csv / table)"""
+
+    def __init__(self, stream: TextIO, fmt: str):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, result: Dict[str, Any]) -> None:
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+        elif self.fmt == "csv":
+            cheapest = result.get("cheapest") or {}
+            depth = result.get("depth") or {}
+            self._csv.writerow({
+                "item_id": result["item_id"],
+                "item_name": result["item_name"],
+                "fetched_at": result.get("fetched_at", ""),
+                "cheapest_price": cheapest.get("price", ""),
+                "cheapest_quantity": cheapest.get("quantity", ""),
+                "cheapest_source": cheapest.get("source", ""),
+                "cheapest_player_id": cheapest.get("player_id", ""),
+                "listings": depth.get("listings", ""),
+                "quantity": depth.get("quantity", ""),
+                "error": result.get("error") or ""
+            })
+        else:
+            listings = [Listing(**x) for x in result.get("listings", [])]
+            if listings:
+                print_merged_listings(listings, result["item_name"], count=len(listings), file=self.stream)
+            else:
+                self.stream.write(f"\n{result['item_name']}: {result.get('error') or '出品情報が見つかりませんでした。'}\n")
+        # cronなどで途中経過を失わないよう1件ごとにフラッシュする
+        self.stream.flush()
+
+def run_batch(
+    specs: Iterable[str],
+    writer: ResultWriter,
+    api_key: str,
+    workers: int = 4,
+    bazaar_rate: float = 60,
+    market_rate: float = 60,
+    listing_limit: int = 20
+) -> int:
+    """アイテム指定を並列に取得し、完了した順に書き出す。書き出した件数を返す
+
+    実行中のタスク数を workers の2倍までに制限するため、入力件数によらずメモリ使用量は一定。
+    """
+    bazaar_limiter = RateLimiter(bazaar_rate)
+    market_limiter = RateLimiter(market_rate)
+    catalog: Optional[Dict[str, int]] = None
+    written = 0
+
+    def drain(futures: Set[Future]) -> None:
+        nonlocal written
+        for future in futures:
+            writer.write(future.result())
+            written += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future] = set()
+
+        for spec in specs:
+            item_name = None
+            # isdigit() は "²" なども True になるため、ASCII の数字のみIDとして扱う
+            if spec.isascii() and spec.isdigit():
+                item_id = int(spec)
+            else:
+                if not api_key or api_key == TORN_API_KEY:
+                    writer.write({"item_id": None, "item_name": spec, "error": "api key required for item names"})
+                    written += 1
+                    continue
+
+                # 名前指定が初めて現れた時点で全アイテム一覧を1回だけ取得する
+                if catalog is None:
+                    market_limiter.wait()
+                    catalog = {name.lower(): i for i, name in fetch_all_items(api_key).items()}
+                item_id = catalog.get(spec.lower())
+                item_name = spec
+                if item_id is None:
+                    # 一覧の取得自体に失敗した場合は区別して報告する
+                    error = "unknown item" if catalog else "item list unavailable"
+                    writer.write({"item_id": None, "item_name": spec, "error": error})
+                    written += 1
+                    continue
+
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                drain(done)
+
+            pending.add(executor.submit(
+                scan_item, item_id, api_key, bazaar_limiter, market_limiter, item_name, listing_limit
+            ))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            drain(done)
+
+    return written
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bazaar / Item Market の出品情報を一括取得します")
+    parser.add_argument("items", nargs="*", help="アイテムIDまたはアイテム名")
+    parser.add_argument("-i", "--input", action="append", default=[],
+                        help="アイテム指定を1行1件で読み込むファイル ('-' で標準入力)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv", "table"], default="jsonl")
+    parser.add_argument("-o", "--output", default="-", help="出力先ファイル ('-' で標準出力)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="同時取得数")
+    parser.add_argument("--bazaar-rate", type=float, default=60, help="weav3r.dev への1分あたりの最大リクエスト数")
+    parser.add_argument("--market-rate", type=float, default=60, help="Torn API への1分あたりの最大リクエスト数")
+    parser.add_argument("--limit", type=int, default=20, help="1アイテムあたりに出力する出品数")
+    parser.add_argument("--api-key", default=os.environ.get("TORN_API_KEY", TORN_API_KEY),
+                        help="Torn APIキー (既定: 環境変数 TORN_API_KEY)")
+    args = parser.parse_args(argv)
+
+    if not args.items and not args.input:
+        if sys.stdin.isatty():
+            parser.error("アイテムIDまたは --input を指定してください。")
+        args.input = ["-"]
+
+    sources: List[Iterable[str]] = [args.items]
+    opened: List[TextIO] = []
+    for path in args.input:
+        if path == "-":
+            sources.append(sys.stdin)
+        else:
+            f = open(path, "r", encoding="utf-8")
+            opened.append(f)
+            sources.append(f)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
 
-    # 最安値情報の表示
-    cheapest = all_listings[0]
-    print(f"\n最安値: ${cheapest.price} (ソース: {cheapest.source}, 数量: {cheapest.quantity})")
+    try:
+        writer = ResultWriter(output, args.format)
+        # 取得関数のログが出力ストリームに混ざらないよう標準エラーへ逃がす
+        with contextlib.redirect_stdout(sys.stderr):
+            run_batch(
+                iter_item_specs(sources),
+                writer,
+                args.api_key,
+                workers=max(1, args.workers),
+                bazaar_rate=args.bazaar_rate,
+                market_rate=args.market_rate,
+                listing_limit=max(0, args.limit)
+            )
+    finally:
+        for f in opened:
+            f.close()
+        if output is not sys.stdout:
+            output.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,4 @@
+-- 大文字小文字を区別しない照合順序を明示し、name にインデックスを張る
+ALTER TABLE items MODIFY name VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL;
+
+CREATE INDEX idx_items_name ON items (name);
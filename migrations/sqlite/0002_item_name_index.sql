@@ -0,0 +1,2 @@
+-- get_item_id は name = ? COLLATE NOCASE で検索するため、同じ照合順序のインデックスを張る
+CREATE INDEX IF NOT EXISTS idx_items_name_nocase ON items (name COLLATE NOCASE);
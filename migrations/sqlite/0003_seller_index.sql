@@ -0,0 +1,20 @@
+CREATE TABLE IF NOT EXISTS sellers (
+    player_id INTEGER PRIMARY KEY,
+    player_name VARCHAR(255) NOT NULL,
+    below_threshold_count INTEGER NOT NULL DEFAULT 0,
+    last_below_threshold_at BIGINT NOT NULL DEFAULT 0,
+    last_seen BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS seller_listings (
+    player_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    price BIGINT NOT NULL,
+    quantity INTEGER NOT NULL,
+    content_updated BIGINT NOT NULL DEFAULT 0,
+    last_seen BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, item_id)
+);
+
+-- アイテムごとの出品の置き換えは item_id で引く
+CREATE INDEX IF NOT EXISTS idx_seller_listings_item ON seller_listings (item_id);
@@ -1,7 +1,7 @@
 import pymysql
 from typing import Optional, List, Tuple, Dict
-import os
 from contextlib import closing
+import db_migrations
 
 class MySQLClient:
     def __init__(self, host: str, port: int, user: str, password: str, db_name: str):
@@ -23,36 +23,16 @@ class MySQLClient:
         )
 
     def init_db(self):
-        """Initializes the database tables from database.sql."""
-        # For MySQL, we need to create the database if it doesn't exist?
-        # Usually client connects to a specific DB.
-        # Assuming the DB exists, we just run the schema.
-        # If DB doesn't exist, we might fail to connect in _get_conn().
-        # However, typically the user should create the DB first or we connect to 'mysql' to create it.
-        # Given the config has DB Name, we assume it exists or we can't connect to it yet.
-
-        # Let's try to connect. If DB doesn't exist, we might error.
-        # But for now, let's assume the DB 'ganacsade' exists or the user created it.
-        # We will just run the table creation scripts.
-
-        sql_file_path = os.path.join(os.path.dirname(__file__), 'database.sql')
-        with open(sql_file_path, 'r') as f:
-            sql_script = f.read()
-
-        # Split by ';' to execute statements one by one
-        statements = [s.strip() for s in sql_script.split(';') if s.strip()]
-
+        """Applies pending schema migrations."""
+        # The database itself (config.Database.Name) must already exist.
         with closing(self._get_conn()) as conn:
-            with conn.cursor() as cursor:
-                for statement in statements:
-                    cursor.execute(statement)
-            conn.commit()
+            db_migrations.run_migrations(conn, 'mysql', '%s')
 
     def get_item_id(self, name: str) -> Optional[int]:
         """Gets item ID by name (case-insensitive)."""
         with closing(self._get_conn()) as conn:
             with conn.cursor() as cursor:
-                # MySQL is case-insensitive by default for VARCHAR usually
+                # items.name uses a case-insensitive collation (see migrations/mysql)
                 cursor.execute("SELECT item_id FROM items WHERE name = %s", (name,))
                 row = cursor.fetchone()
                 return row[0] if row else None
@@ -114,6 +94,65 @@ class MySQLClient:
                 cursor.execute("SELECT item_id, threshold_price FROM watch_list")
                 return list(cursor.fetchall())
 
+    def get_watches_with_names(self) -> List[Tuple[int, int, Optional[str]]]:
+        """Returns all watches with item names in one query: (item_id, threshold_price, name)."""
+        with closing(self._get_conn()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT w.item_id, w.threshold_price, i.name
+                    FROM watch_list w LEFT JOIN items i ON i.item_id = w.item_id
+                    ORDER BY w.item_id
+                """)
+                return list(cursor.fetchall())
+
+    def save_seller_item(self, item_id: int, listings: List[Tuple[int, int, int, int, int]],
+                         sellers: List[Tuple[int, str, int, int, int]]):
+        """Replaces the seller listings of one item and upserts the sellers involved.
+
+        listings: (player_id, price, quantity, content_updated, last_seen)
+        sellers: (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)
+        """
+        with closing(self._get_conn()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM seller_listings WHERE item_id = %s", (item_id,))
+                if listings:
+                    cursor.executemany("""
+                        INSERT INTO seller_listings (player_id, item_id, price, quantity, content_updated, last_seen)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, [(pid, item_id, price, qty, updated, seen) for pid, price, qty, updated, seen in listings])
+                if sellers:
+                    cursor.executemany("""
+                        INSERT INTO sellers
+                        (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            player_name = VALUES(player_name),
+                            below_threshold_count = VALUES(below_threshold_count),
+                            last_below_threshold_at = VALUES(last_below_threshold_at),
+                            last_seen = VALUES(last_seen)
+                    """, sellers)
+            conn.commit()
+
+    def get_sellers(self) -> List[Tuple[int, str, int, int, int]]:
+        """Returns all sellers: (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)."""
+        with closing(self._get_conn()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen
+                    FROM sellers
+                """)
+                return list(cursor.fetchall())
+
+    def get_seller_listings(self) -> List[Tuple[int, int, int, int, int, int]]:
+        """Returns all seller listings: (player_id, item_id, price, quantity, content_updated, last_seen)."""
+        with closing(self._get_conn()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT player_id, item_id, price, quantity, content_updated, last_seen
+                    FROM seller_listings
+                """)
+                return list(cursor.fetchall())
+
     def set_config(self, key: str, value: str):
         """Sets a config value."""
         with closing(self._get_conn()) as conn:
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, List, Optional, Tuple
+from discord import Embed, Color
+from marketplace import Listing, MarketResponse
+from price_api import PriceCache
+from seller_index import SellerIndex
+
+UniqueKey = Tuple[int, int, int, int, str]
+
+class FetchResult:
+    """監視ループで取得した1アイテム分の生データ"""
+
+    def __init__(
+        self,
+        item_id: int,
+        threshold: int,
+        item_name: str,
+        bazaar_data: Optional[MarketResponse],
+        market_listings: List[Listing],
+        fetched_at: Optional[float] = None
+    ):
+        self.item_id: int = item_id
+        self.threshold: int = threshold
+        self.item_name: str = item_name
+        self.bazaar_data: Optional[MarketResponse] = bazaar_data
+        self.market_listings: List[Listing] = market_listings
+        self.fetched_at: float = fetched_at if fetched_at is not None else time.time()
+
+class AlertPayload:
+    """送信するだけの状態になった通知"""
+
+    def __init__(self, unique_key: UniqueKey, embed: Embed):
+        self.unique_key: UniqueKey = unique_key
+        self.embed: Embed = embed
+
+def build_alert_embed(item_name: str, threshold: int, cheapest: Listing, repeat_count: int = 0) -> Embed:
+    embed = Embed(title=f"Price Alert: {item_name}", color=Color.red())
+    embed.description = f"${cheapest.price:,} x {cheapest.quantity:,}"
+    embed.add_field(name="目標価格", value=f"${threshold:,}", inline=True)
+    embed.add_field(name="最安値", value=f"${cheapest.price:,}", inline=True)
+    embed.add_field(name="出品者", value=cheapest.player_name, inline=False)
+    if repeat_count > 1:
+        embed.add_field(name="この出品者の割安出品", value=f"{repeat_count}回目", inline=True)
+    embed.add_field(name="数量", value=f"{cheapest.quantity:,}", inline=True)
+    embed.add_field(name="差額", value=f"${threshold - cheapest.price:,}", inline=True)
+    if cheapest.source in ['ItemMarket', 'Bazaar']:
+        if cheapest.source == 'ItemMarket':
+            source_url = f"https://www.torn.com/page.php?sid=ItemMarket#/market/view=search&itemID={cheapest.item_id}"
+        else:
+            source_url = f"https://www.torn.com/bazaar.php?userId={cheapest.player_id}&itemId={cheapest.item_id}&highlight=1#/"
+        embed.add_field(name="URL", value=source_url, inline=False)
+    return embed
+
+def evaluate(
+    result: FetchResult,
+    price_cache: PriceCache,
+    seller_index: SellerIndex,
+    notified: Collection[UniqueKey]
+) -> Optional[AlertPayload]:
+    """1アイテム分の取得結果をキャッシュと出品者索引に反映し、通知が必要なら返す"""
+    bazaar_data = result.bazaar_data
+    all_listings = (bazaar_data.listings if bazaar_data else []) + result.market_listings
+
+    price_cache.record(
+        result.item_id,
+        result.item_name,
+        all_listings,
+        market_price=bazaar_data.market_price if bazaar_data else None,
+        bazaar_average=bazaar_data.bazaar_average if bazaar_data else None,
+        fetched_at=result.fetched_at
+    )
+    # Bazaarの取得に失敗した場合は出品が消えたとは限らないため、索引を更新しない
+    # (更新すると次回同じ出品が新規扱いになり、割安出品の回数が水増しされる)
+    if bazaar_data is not None:
+        seller_index.update(result.item_id, all_listings, result.threshold, now=result.fetched_at)
+
+    if not all_listings:
+        return None
+
+    cheapest = min(all_listings, key=lambda x: x.price)
+    if cheapest.price > result.threshold:
+        return None
+
+    unique_key = (
+        cheapest.item_id,
+        cheapest.player_id,
+        cheapest.price,
+        cheapest.quantity,
+        cheapest.source
+    )
+    if unique_key in notified:
+        return None
+
+    seller = seller_index.get(cheapest.player_id) if cheapest.source == 'Bazaar' else None
+    repeat_count = seller.below_threshold_count if seller else 0
+    return AlertPayload(unique_key, build_alert_embed(result.item_name, result.threshold, cheapest, repeat_count))
+
+def evaluate_batch(
+    results: List[FetchResult],
+    price_cache: PriceCache,
+    seller_index: SellerIndex,
+    notified: Collection[UniqueKey]
+) -> List[AlertPayload]:
+    """複数アイテムをまとめて評価する (ワーカースレッドで実行)"""
+    alerts = []
+    for result in results:
+        try:
+            alert = evaluate(result, price_cache, seller_index, notified)
+        except Exception as e:
+            print(f"Error checking item {result.item_id}: {e}")
+            continue
+        if alert:
+            alerts.append(alert)
+    return alerts
+
+class WatchPipeline:
+    """取得結果の評価をスレッドプールで行い、イベントループには通知内容だけを返す
+
+    PriceCache と SellerIndex はロックで保護されているため、
+    ワーカースレッドとイベントループの双方から参照できる。
+
+    取得は1件ずつ間隔を空けて行われ、評価は1つのコンシューマーが順に待つため、
+    ワーカーは1つで足りる。バッチは評価が取得に追いつかず結果がキューに溜まった
+    場合にのみ batch_size 件までまとめられ、通常は1件ずつになる。
+    """
+
+    def __init__(self, price_cache: PriceCache, seller_index: SellerIndex, batch_size: int = 8):
+        self.price_cache = price_cache
+        self.seller_index = seller_index
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watch-eval")
+
+    async def evaluate(self, results: List[FetchResult], notified: Collection[UniqueKey]) -> List[AlertPayload]:
+        loop = asyncio.get_running_loop()
+        # 評価中に通知済みキャッシュが変わっても影響しないよう、スナップショットを渡す
+        return await loop.run_in_executor(
+            self._executor, evaluate_batch, results, self.price_cache, self.seller_index, frozenset(notified)
+        )
+
+    async def batches(self, queue: "asyncio.Queue[Optional[FetchResult]]"):
+        """キューに溜まっている取得結果を最大 batch_size 件ずつ返す非同期ジェネレーター
+
+        None を受け取ると終了する。
+        """
+        finished = False
+        while not finished:
+            batch = []
+            item = await queue.get()
+            while True:
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size or queue.empty():
+                    break
+                item = queue.get_nowait()
+
+            if batch:
+                yield batch
+
+class LoopLagGuard:
+    """イベントループの遅延を計測し、予算を超えている間は低優先度の処理を延期・省略させる"""
+
+    def __init__(self, budget: float = 0.25, interval: float = 0.5):
+        self.budget = budget
+        self.interval = interval
+        self.lag: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._warned_at: float = 0.0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, loop.time() - started - self.interval)
+            # 1回の遅延で即座に回復扱いにしないよう、減衰させながら最大値を保持する
+            self.lag = max(sample, self.lag * 0.5)
+
+            if self.overloaded and time.time() - self._warned_at > 60:
+                self._warned_at = time.time()
+                print(f"イベントループの遅延が {self.lag:.2f}秒 に達しています。低優先度の処理を延期します。")
+
+    @property
+    def overloaded(self) -> bool:
+        return self.lag > self.budget
+
+    async def wait_until_healthy(self, max_wait: float) -> bool:
+        """遅延が予算内に戻るまで最大 max_wait 秒待つ。戻った場合は True"""
+        deadline = time.monotonic() + max_wait
+        while self.overloaded:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.interval)
+        return True
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from marketplace import Listing
+
+DEFAULT_LISTING_LIMIT = 20
+# ids / names で指定できる最大件数、および全件取得時の1ページあたりの件数
+MAX_BULK_ITEMS = 200
+
+class ItemSnapshot:
+    """ある時点で取得した1アイテム分の統合出品情報"""
+
+    def __init__(
+        self,
+        item_id: int,
+        item_name: str,
+        listings: List[Listing],
+        fetched_at: float,
+        version: int,
+        market_price: Optional[int] = None,
+        bazaar_average: Optional[int] = None
+    ):
+        self.item_id: int = item_id
+        self.item_name: str = item_name
+        self.listings: List[Listing] = sorted(listings, key=lambda x: x.price)
+        self.fetched_at: float = fetched_at
+        self.version: int = version
+        self.market_price: Optional[int] = market_price
+        self.bazaar_average: Optional[int] = bazaar_average
+
+    @property
+    def cheapest(self) -> Optional[Listing]:
+        return self.listings[0] if self.listings else None
+
+    def depth(self) -> Dict[str, int]:
+        """出品件数と総数量"""
+        return {
+            "listings": len(self.listings),
+            "quantity": sum(x.quantity for x in self.listings),
+            "bazaar": sum(1 for x in self.listings if x.source == "Bazaar"),
+            "item_market": sum(1 for x in self.listings if x.source == "ItemMarket")
+        }
+
+class PriceCache:
+    """監視ループで取得した最新の出品情報と価格履歴を保持するキャッシュ
+
+    監視ループ(イベントループ)とAPIサーバー(別スレッド)の両方から参照されるため、
+    すべての操作はロックで保護する。
+    """
+
+    def __init__(self, history_size: int = 120):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[int, ItemSnapshot] = {}
+        self._history: Dict[int, Deque[Tuple[float, int, int]]] = {}
+        self._history_size = history_size
+        # version はプロセスごとに1から数え直すため、ETagにはプロセス固有の値も含める
+        self.epoch: str = secrets.token_hex(8)
+
+    def record(
+        self,
+        item_id: int,
+        item_name: str,
+        listings: List[Listing],
+        market_price: Optional[int] = None,
+        bazaar_average: Optional[int] = None,
+        fetched_at: Optional[float] = None
+    ) -> ItemSnapshot:
+        """取得結果を登録し、最安値を履歴に追加する"""
+        if fetched_at is None:
+            fetched_at = time.time()
+
+        with self._lock:
+            previous = self._snapshots.get(item_id)
+            version = previous.version + 1 if previous else 1
+            snapshot = ItemSnapshot(item_id, item_name, listings, fetched_at, version, market_price, bazaar_average)
+            self._snapshots[item_id] = snapshot
+
+            cheapest = snapshot.cheapest
+            if cheapest:
+                history = self._history.get(item_id)
+                if history is None:
+                    history = deque(maxlen=self._history_size)
+                    self._history[item_id] = history
+                history.append((fetched_at, cheapest.price, cheapest.quantity))
+
+            return snapshot
+
+    def get(self, item_id: int) -> Optional[ItemSnapshot]:
+        with self._lock:
+            return self._snapshots.get(item_id)
+
+    def get_many(self, item_ids: List[int]) -> Dict[int, Optional[ItemSnapshot]]:
+        with self._lock:
+            return {item_id: self._snapshots.get(item_id) for item_id in item_ids}
+
+    def history(self, item_id: int) -> List[Tuple[float, int, int]]:
+        """(取得時刻, 最安値, 最安値の数量) のリスト (古い順)"""
+        with self._lock:
+            return list(self._history.get(item_id, ()))
+
+    def item_ids(self) -> List[int]:
+        with self._lock:
+            return sorted(self._snapshots)
+
+def snapshot_to_dict(snapshot: ItemSnapshot, history: List[Tuple[float, int, int]], limit: int) -> Dict[str, Any]:
+    """APIレスポンス用の辞書に変換する"""
+    cheapest = snapshot.cheapest
+    return {
+        "item_id": snapshot.item_id,
+        "item_name": snapshot.item_name,
+        "fetched_at": int(snapshot.fetched_at),
+        "market_price": snapshot.market_price,
+        "bazaar_average": snapshot.bazaar_average,
+        "cheapest": cheapest.to_dict() if cheapest else None,
+        "depth": snapshot.depth(),
+        "listings": [x.to_dict() for x in snapshot.listings[:limit]],
+        "history": [{"timestamp": int(t), "price": p, "quantity": q} for t, p, q in history]
+    }
+
+class PriceAPIServer:
+    """キャッシュ済みの価格情報を返す読み取り専用のローカルHTTPサーバー
+
+    GET /items/<item_id>          単一アイテム
+    GET /items?ids=1,2&names=X    複数アイテム (idsとnamesは併用可、合計 MAX_BULK_ITEMS 件まで)
+    GET /items?offset=N           キャッシュ済みの全アイテム (MAX_BULK_ITEMS 件ずつ、next_offset で続きを取得)
+
+    どのリクエストも上流API (weav3r.dev / Torn API) にはアクセスしない。
+    レスポンスにはETagを付与し、If-None-Matchが一致すれば304を返す。
+    """
+
+    def __init__(self, cache: PriceCache, db: Any, host: str = "127.0.0.1", port: int = 8765):
+        self.cache = cache
+        self.db = db
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """バックグラウンドスレッドでサーバーを起動する"""
+        if self._server is not None:
+            return
+
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="price-api", daemon=True)
+        self._thread.start()
+        print(f"価格APIを http://{self.host}:{self.port} で起動しました。")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    def split_specs(query: Dict[str, List[str]], key: str) -> List[str]:
+        """カンマ区切りのクエリパラメータを要素ごとに分割する"""
+        return [part.strip() for value in query.get(key, []) for part in value.split(",") if part.strip()]
+
+    def resolve_items(self, ids: List[str], names: List[str]) -> Tuple[List[int], List[str]]:
+        """アイテムIDとアイテム名の指定から、アイテムIDのリストと解決できなかった指定を返す"""
+        item_ids: List[int] = []
+        unresolved: List[str] = []
+
+        for part in ids:
+            # isdigit() は "²" なども True になるため、ASCII の数字のみ受け付ける
+            if part.isascii() and part.isdigit():
+                item_ids.append(int(part))
+            else:
+                unresolved.append(part)
+
+        for part in names:
+            item_id = self.db.get_item_id(part)
+            if item_id:
+                item_ids.append(item_id)
+            else:
+                unresolved.append(part)
+
+        # 重複を除去 (順序は維持)
+        return list(dict.fromkeys(item_ids)), unresolved
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "ganacsade-price-api"
+
+            def do_GET(self):
+                self._handle(send_body=True)
+
+            def do_HEAD(self):
+                self._handle(send_body=False)
+
+            def log_message(self, format, *args):
+                # アクセスログは出力しない
+                pass
+
+            def _handle(self, send_body: bool):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = [p for p in url.path.split("/") if p]
+
+                try:
+                    limit = max(0, int(query.get("limit", [DEFAULT_LISTING_LIMIT])[0]))
+                    offset = max(0, int(query.get("offset", [0])[0]))
+                except ValueError:
+                    self._send_json(400, {"error": "limit and offset must be integers"}, send_body)
+                    return
+
+                if parts == ["items"]:
+                    if "ids" in query or "names" in query:
+                        ids = api.split_specs(query, "ids")
+                        names = api.split_specs(query, "names")
+                        # 件数の確認は名前のDB検索より前に行う
+                        if len(ids) + len(names) > MAX_BULK_ITEMS:
+                            self._send_json(400, {"error": f"too many items (max {MAX_BULK_ITEMS})"}, send_body)
+                            return
+                        item_ids, unresolved = api.resolve_items(ids, names)
+                        self._send_items(item_ids, unresolved, limit, send_body, bulk=True)
+                    else:
+                        all_ids = api.cache.item_ids()
+                        page = all_ids[offset:offset + MAX_BULK_ITEMS]
+                        next_offset = offset + len(page) if offset + len(page) < len(all_ids) else None
+                        self._send_items(page, [], limit, send_body, bulk=True,
+                                         page={"offset": offset, "total": len(all_ids), "next_offset": next_offset})
+                elif len(parts) == 2 and parts[0] == "items" and parts[1].isascii() and parts[1].isdigit():
+                    self._send_items([int(parts[1])], [], limit, send_body, bulk=False)
+                else:
+                    self._send_json(404, {"error": "not found"}, send_body)
+
+            def _send_items(
+                self,
+                item_ids: List[int],
+                unresolved: List[str],
+                limit: int,
+                send_body: bool,
+                bulk: bool,
+                page: Optional[Dict[str, Any]] = None
+            ):
+                snapshots = api.cache.get_many(item_ids)
+
+                if not bulk and snapshots[item_ids[0]] is None:
+                    self._send_json(404, {"error": "item not cached", "item_id": item_ids[0]}, send_body)
+                    return
+
+                # ETagはキャッシュのバージョンから算出するため、304の場合はレスポンスを組み立てない
+                tag_source = api.cache.epoch + "|" + ",".join(
+                    f"{item_id}:{s.version if s else 0}" for item_id, s in snapshots.items()
+                )
+                tag_source += f"|{limit}|{','.join(unresolved)}|{int(bulk)}|{json.dumps(page)}"
+                etag = '"' + hashlib.sha1(tag_source.encode()).hexdigest() + '"'
+
+                if self._etag_matches(etag):
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    return
+
+                items = {
+                    str(item_id): snapshot_to_dict(s, api.cache.history(item_id), limit) if s else None
+                    for item_id, s in snapshots.items()
+                }
+                if bulk:
+                    payload: Dict[str, Any] = {"items": items, "unresolved": unresolved}
+                    if page is not None:
+                        payload.update(page)
+                else:
+                    payload = items[str(item_ids[0])]
+
+                self._send_json(200, payload, send_body, etag)
+
+            def _etag_matches(self, etag: str) -> bool:
+                header = self.headers.get("If-None-Match")
+                if not header:
+                    return False
+                candidates = [c.strip() for c in header.split(",")]
+                return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+            def _send_json(self, status: int, payload: Any, send_body: bool, etag: Optional[str] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from marketplace import Listing
+
+class SellerListing:
+    """ある出品者の1アイテム分のBazaar出品"""
+
+    def __init__(self, item_id: int, price: int, quantity: int, content_updated: int, last_seen: int):
+        self.item_id: int = item_id
+        self.price: int = price
+        self.quantity: int = quantity
+        self.content_updated: int = content_updated
+        self.last_seen: int = last_seen
+
+class Seller:
+    """出品者ごとの出品状況と、目標価格以下での出品回数"""
+
+    def __init__(
+        self,
+        player_id: int,
+        player_name: str,
+        below_threshold_count: int = 0,
+        last_below_threshold_at: int = 0,
+        last_seen: int = 0
+    ):
+        self.player_id: int = player_id
+        self.player_name: str = player_name
+        self.below_threshold_count: int = below_threshold_count
+        self.last_below_threshold_at: int = last_below_threshold_at
+        self.last_seen: int = last_seen
+        self.listings: Dict[int, SellerListing] = {}
+
+    def to_row(self) -> Tuple[int, str, int, int, int]:
+        return (self.player_id, self.player_name, self.below_threshold_count, self.last_below_threshold_at, self.last_seen)
+
+class SellerIndex:
+    """監視ループの取得結果から出品者→出品の索引を差分更新する
+
+    同じ出品 (価格と content_updated が同じ) を何度観測しても割安出品の回数は増えない。
+    db を渡した場合は更新のたびに sellers / seller_listings テーブルへ保存する。
+
+    評価ワーカーとイベントループの両方から使われるため、索引の変更はロック内で行い、
+    Seller.listings は置き換え (コピーオンライト) で更新する。
+    """
+
+    def __init__(self, db: Any = None):
+        self.db = db
+        self._lock = threading.Lock()
+        self._sellers: Dict[int, Seller] = {}
+        # item_id -> そのアイテムを出品中の player_id
+        self._by_item: Dict[int, Set[int]] = {}
+
+    def load(self):
+        """DBから索引を復元する"""
+        if self.db is None:
+            return
+
+        sellers: Dict[int, Seller] = {}
+        by_item: Dict[int, Set[int]] = {}
+        for player_id, player_name, count, last_below, last_seen in self.db.get_sellers():
+            sellers[player_id] = Seller(player_id, player_name, count, last_below, last_seen)
+        for player_id, item_id, price, quantity, content_updated, last_seen in self.db.get_seller_listings():
+            seller = sellers.get(player_id)
+            if seller is None:
+                continue
+            seller.listings[item_id] = SellerListing(item_id, price, quantity, content_updated, last_seen)
+            by_item.setdefault(item_id, set()).add(player_id)
+
+        with self._lock:
+            self._sellers = sellers
+            self._by_item = by_item
+
+    def update(self, item_id: int, listings: List[Listing], threshold: int, now: Optional[float] = None) -> List[Seller]:
+        """1アイテム分の取得結果を反映し、新たに目標価格以下で出品した出品者を返す
+
+        listings にない出品は取り下げられたものとして扱うため、Bazaarの取得に失敗した結果は渡さないこと。
+        """
+        now = int(now if now is not None else time.time())
+
+        # 出品者ごとに最安の出品のみを扱う (Item Marketは出品者が分からないため対象外)
+        current: Dict[int, Listing] = {}
+        for listing in listings:
+            if listing.source != "Bazaar" or not listing.player_id:
+                continue
+            existing = current.get(listing.player_id)
+            if existing is None or listing.price < existing.price:
+                current[listing.player_id] = listing
+
+        underpricing: List[Seller] = []
+        with self._lock:
+            previous_ids = self._by_item.get(item_id, set())
+            for player_id in previous_ids - current.keys():
+                seller = self._sellers.get(player_id)
+                if seller:
+                    seller_listings = dict(seller.listings)
+                    seller_listings.pop(item_id, None)
+                    seller.listings = seller_listings
+
+            for player_id, listing in current.items():
+                seller = self._sellers.get(player_id)
+                if seller is None:
+                    seller = Seller(player_id, listing.player_name)
+                    self._sellers[player_id] = seller
+                seller.player_name = listing.player_name
+                seller.last_seen = now
+
+                old = seller.listings.get(item_id)
+                is_new_listing = old is None or old.price != listing.price or old.content_updated != listing.content_updated
+                seller_listings = dict(seller.listings)
+                seller_listings[item_id] = SellerListing(item_id, listing.price, listing.quantity, listing.content_updated, now)
+                seller.listings = seller_listings
+
+                if is_new_listing and listing.price <= threshold:
+                    seller.below_threshold_count += 1
+                    seller.last_below_threshold_at = now
+                    underpricing.append(seller)
+
+            self._by_item[item_id] = set(current)
+            seller_rows = [self._sellers[pid].to_row() for pid in current]
+
+        if self.db is not None:
+            self.db.save_seller_item(
+                item_id,
+                [(pid, l.price, l.quantity, l.content_updated, now) for pid, l in current.items()],
+                seller_rows
+            )
+
+        return underpricing
+
+    def get(self, player_id: int) -> Optional[Seller]:
+        with self._lock:
+            return self._sellers.get(player_id)
+
+    def repeat_underpricers(self, min_count: int = 2, since: Optional[float] = None) -> List[Seller]:
+        """目標価格以下での出品を min_count 回以上観測した出品者 (回数の多い順)"""
+        with self._lock:
+            sellers = [
+                s for s in self._sellers.values()
+                if s.below_threshold_count >= min_count and (since is None or s.last_below_threshold_at >= since)
+            ]
+        return sorted(sellers, key=lambda s: (-s.below_threshold_count, -s.last_below_threshold_at))
+
+    def boosted_items(self, min_count: int = 2) -> Set[int]:
+        """割安出品を繰り返す出品者が現在出品しているアイテム"""
+        items: Set[int] = set()
+        for seller in self.repeat_underpricers(min_count):
+            items.update(seller.listings)
+        return items
+
+    def prioritize(self, watches: List[Tuple], every: int = 3, min_count: int = 2) -> Tuple[List[Tuple], Set[int]]:
+        """1周分のチェック順を作る (watches は先頭要素が item_id のタプル)
+
+        優先アイテムを先頭に置き、さらに通常アイテム every 件ごとに優先アイテムを再度挟む。
+        優先アイテムは1周の間に複数回チェックされるため、ポーリング間隔が短くなる。
+        チェック順と優先アイテムの集合を返す。
+        """
+        boosted = self.boosted_items(min_count)
+        priority = [w for w in watches if w[0] in boosted]
+        normal = [w for w in watches if w[0] not in boosted]
+
+        schedule = list(priority)
+        for i in range(0, len(normal), every):
+            schedule.extend(normal[i:i + every])
+            # 最後の区切りの後は次の周の先頭で優先アイテムをチェックするため挟まない
+            if i + every < len(normal):
+                schedule.extend(priority)
+        return schedule, boosted
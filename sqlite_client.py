@@ -1,7 +1,7 @@
 import sqlite3
 from typing import Optional, List, Tuple, Dict
-import os
 from contextlib import closing
+import db_migrations
 
 class SQLiteClient:
     def __init__(self, db_path: str = "ganacsade.db"):
@@ -11,14 +11,9 @@ class SQLiteClient:
         return sqlite3.connect(self.db_path)
 
     def init_db(self):
-        """Initializes the database tables from database.sql."""
+        """Applies pending schema migrations."""
         with closing(self._get_conn()) as conn:
-            with conn:  # Transaction context (commits automatically)
-                cursor = conn.cursor()
-                sql_file_path = os.path.join(os.path.dirname(__file__), 'database.sql')
-                with open(sql_file_path, 'r') as f:
-                    sql_script = f.read()
-                cursor.executescript(sql_script)
+            db_migrations.run_migrations(conn, 'sqlite', '?')
 
     def get_item_id(self, name: str) -> Optional[int]:
         """Gets item ID by name (case-insensitive)."""
@@ -75,6 +70,58 @@ class SQLiteClient:
             cursor.execute("SELECT item_id, threshold_price FROM watch_list")
             return cursor.fetchall()
 
+    def get_watches_with_names(self) -> List[Tuple[int, int, Optional[str]]]:
+        """Returns all watches with item names in one query: (item_id, threshold_price, name)."""
+        with closing(self._get_conn()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT w.item_id, w.threshold_price, i.name
+                FROM watch_list w LEFT JOIN items i ON i.item_id = w.item_id
+                ORDER BY w.item_id
+            """)
+            return cursor.fetchall()
+
+    def save_seller_item(self, item_id: int, listings: List[Tuple[int, int, int, int, int]],
+                         sellers: List[Tuple[int, str, int, int, int]]):
+        """Replaces the seller listings of one item and upserts the sellers involved.
+
+        listings: (player_id, price, quantity, content_updated, last_seen)
+        sellers: (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)
+        """
+        with closing(self._get_conn()) as conn:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM seller_listings WHERE item_id = ?", (item_id,))
+                cursor.executemany("""
+                    INSERT INTO seller_listings (player_id, item_id, price, quantity, content_updated, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [(pid, item_id, price, qty, updated, seen) for pid, price, qty, updated, seen in listings])
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO sellers
+                    (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                """, sellers)
+
+    def get_sellers(self) -> List[Tuple[int, str, int, int, int]]:
+        """Returns all sellers: (player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen)."""
+        with closing(self._get_conn()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT player_id, player_name, below_threshold_count, last_below_threshold_at, last_seen
+                FROM sellers
+            """)
+            return cursor.fetchall()
+
+    def get_seller_listings(self) -> List[Tuple[int, int, int, int, int, int]]:
+        """Returns all seller listings: (player_id, item_id, price, quantity, content_updated, last_seen)."""
+        with closing(self._get_conn()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT player_id, item_id, price, quantity, content_updated, last_seen
+                FROM seller_listings
+            """)
+            return cursor.fetchall()
+
     def set_config(self, key: str, value: str):
         """Sets a config value."""
         with closing(self._get_conn()) as conn:
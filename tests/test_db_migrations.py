@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import db_migrations
+from sqlite_client import SQLiteClient
+
+# SQLiteClient の頻出クエリ (get_item_id / get_item_name / get_config)
+SQLITE_HOT_QUERIES = [
+    ("SELECT item_id FROM items WHERE name = ? COLLATE NOCASE", ("Xanax",)),
+    ("SELECT name FROM items WHERE item_id = ?", (206,)),
+    ("SELECT conf_value FROM bot_config WHERE conf_name = ?", ("notification_channel_id",)),
+]
+
+INDEXED_PLAN = re.compile(r"^SEARCH \w+ USING .*(INDEX|PRIMARY KEY)")
+
+
+@pytest.fixture
+def sqlite_conn(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    with closing(sqlite3.connect(db_path)) as conn:
+        db_migrations.run_migrations(conn, "sqlite", "?")
+        yield conn
+
+
+def test_run_migrations_records_versions(sqlite_conn):
+    versions = [v for v, _, _ in db_migrations.list_migrations("sqlite")]
+    applied = [row[0] for row in sqlite_conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert applied == versions
+
+    # 2回目は何も適用しない
+    assert db_migrations.run_migrations(sqlite_conn, "sqlite", "?") == []
+
+
+def test_sqlite_failed_migration_rolls_back(tmp_path, monkeypatch):
+    sqlite_dir = tmp_path / "migrations" / "sqlite"
+    sqlite_dir.mkdir(parents=True)
+    (sqlite_dir / "0001_first.sql").write_text("CREATE TABLE first_table (id INTEGER PRIMARY KEY);")
+    (sqlite_dir / "0002_broken.sql").write_text(
+        "CREATE TABLE second_table (id INTEGER PRIMARY KEY);\nTHIS IS NOT SQL;"
+    )
+    monkeypatch.setattr(db_migrations, "MIGRATIONS_DIR", str(tmp_path / "migrations"))
+
+    with closing(sqlite3.connect(str(tmp_path / "test.db"))) as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            db_migrations.run_migrations(conn, "sqlite", "?")
+
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "first_table" in tables
+        assert "second_table" not in tables
+        assert [row[0] for row in conn.execute("SELECT version FROM schema_version")] == [1]
+
+
+def test_backends_have_same_versions():
+    sqlite_versions = [(v, name) for v, name, _ in db_migrations.list_migrations("sqlite")]
+    mysql_versions = [(v, name) for v, name, _ in db_migrations.list_migrations("mysql")]
+    assert sqlite_versions == mysql_versions
+
+
+@pytest.mark.parametrize("sql, params", SQLITE_HOT_QUERIES)
+def test_sqlite_hot_queries_use_index(sqlite_conn, sql, params):
+    plan = [row[-1] for row in sqlite_conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    assert plan and all(INDEXED_PLAN.match(detail) for detail in plan), plan
+
+
+def test_sqlite_item_name_lookup_is_case_insensitive(tmp_path):
+    db = SQLiteClient(str(tmp_path / "test.db"))
+    db.init_db()
+    db.upsert_items({206: "Xanax"})
+    assert db.get_item_id("xanax") == 206
+    assert db.get_item_id("XANAX") == 206
+
+
+def _mysql_client():
+    """環境変数 GANACSADE_TEST_MYSQL_* が設定されている場合のみ MySQLClient を返す"""
+    host = os.environ.get("GANACSADE_TEST_MYSQL_HOST")
+    if not host:
+        pytest.skip("GANACSADE_TEST_MYSQL_HOST is not set")
+    pytest.importorskip("pymysql")
+    from mysql_client import MySQLClient
+
+    return MySQLClient(
+        host=host,
+        port=int(os.environ.get("GANACSADE_TEST_MYSQL_PORT", "3306")),
+        user=os.environ.get("GANACSADE_TEST_MYSQL_USER", "root"),
+        password=os.environ.get("GANACSADE_TEST_MYSQL_PASSWORD", ""),
+        db_name=os.environ.get("GANACSADE_TEST_MYSQL_DB", "ganacsade_test")
+    )
+
+
+def test_mysql_item_name_lookup_uses_index():
+    db = _mysql_client()
+    db.init_db()
+    db.upsert_items({206: "Xanax", 196: "Cannabis", 180: "Bottle of Beer"})
+
+    assert db.get_item_id("xanax") == 206
+
+    with closing(db._get_conn()) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN SELECT item_id FROM items WHERE name = %s", ("Xanax",))
+            columns = [c[0] for c in cursor.description]
+            row = dict(zip(columns, cursor.fetchone()))
+
+    assert row["key"] == "idx_items_name", row
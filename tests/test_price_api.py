@@ -0,0 +1,103 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("cloudscraper")
+
+from marketplace import Listing
+from price_api import MAX_BULK_ITEMS, PriceAPIServer, PriceCache
+
+
+class FakeDB:
+    def get_item_id(self, name):
+        return {"xanax": 206}.get(name.lower())
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(cache):
+        server = PriceAPIServer(cache, FakeDB(), port=0)
+        server.start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server._server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def get(url, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            body = response.read()
+            return response.status, response.headers.get("ETag"), json.loads(body) if body else None
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, e.headers.get("ETag"), json.loads(body) if body else None
+
+
+def make_cache(price):
+    cache = PriceCache()
+    cache.record(206, "Xanax", [Listing(price, 1, item_id=206, source="ItemMarket")])
+    return cache
+
+
+def test_if_none_match_returns_304_until_data_changes(serve):
+    cache = make_cache(100)
+    base = serve(cache)
+
+    status, etag, body = get(f"{base}/items/206")
+    assert status == 200 and body["cheapest"]["price"] == 100
+
+    status, _, body = get(f"{base}/items/206", etag)
+    assert status == 304 and body is None
+
+    cache.record(206, "Xanax", [Listing(90, 1, item_id=206, source="ItemMarket")])
+    status, new_etag, body = get(f"{base}/items/206", etag)
+    assert status == 200 and new_etag != etag and body["cheapest"]["price"] == 90
+
+
+def test_etag_does_not_match_across_cache_instances(serve):
+    # 再起動後は version が1から数え直しになるため、ETagが一致してはならない
+    status, old_etag, _ = get(f"{serve(make_cache(100))}/items/206")
+    assert status == 200
+
+    status, new_etag, body = get(f"{serve(make_cache(999))}/items/206", old_etag)
+    assert status == 200 and new_etag != old_etag and body["cheapest"]["price"] == 999
+
+
+def test_bulk_query_reports_unresolved_specs(serve):
+    base = serve(make_cache(100))
+    status, _, body = get(f"{base}/items?ids=206,%C2%B2&names=xanax,nope")
+    assert status == 200
+    assert list(body["items"]) == ["206"]
+    assert body["unresolved"] == ["²", "nope"]
+
+
+def test_bulk_query_is_capped(serve):
+    base = serve(make_cache(100))
+    ids = ",".join(str(i) for i in range(MAX_BULK_ITEMS + 1))
+    status, _, _ = get(f"{base}/items?ids={ids}")
+    assert status == 400
+
+
+def test_unfiltered_listing_is_paginated(serve):
+    cache = PriceCache()
+    for item_id in range(1, MAX_BULK_ITEMS + 51):
+        cache.record(item_id, f"Item {item_id}", [Listing(item_id, 1, item_id=item_id)])
+    base = serve(cache)
+
+    status, _, first = get(f"{base}/items?limit=0")
+    assert status == 200
+    assert len(first["items"]) == MAX_BULK_ITEMS
+    assert first["total"] == MAX_BULK_ITEMS + 50
+    assert first["next_offset"] == MAX_BULK_ITEMS
+
+    status, _, second = get(f"{base}/items?limit=0&offset={first['next_offset']}")
+    assert status == 200
+    assert len(second["items"]) == 50 and second["next_offset"] is None
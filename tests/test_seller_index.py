@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("cloudscraper")
+
+from marketplace import Listing, MarketResponse
+from price_api import PriceCache
+from seller_index import SellerIndex
+
+
+def bazaar_listing(price, player_id=9, item_id=1, content_updated=100):
+    return Listing(price, 1, item_id=item_id, player_id=player_id, player_name=f"p{player_id}",
+                   source="Bazaar", content_updated=content_updated)
+
+
+def test_same_listing_is_counted_once():
+    index = SellerIndex()
+    assert len(index.update(1, [bazaar_listing(50)], threshold=100)) == 1
+    assert index.update(1, [bazaar_listing(50)], threshold=100) == []
+    assert index.get(9).below_threshold_count == 1
+
+    # 出品し直し (content_updated が変わる) は新しい出品として数える
+    index.update(1, [bazaar_listing(50, content_updated=200)], threshold=100)
+    assert index.get(9).below_threshold_count == 2
+
+
+def test_failed_bazaar_fetch_does_not_recount_listing():
+    pipeline = pytest.importorskip("pipeline")
+    cache = PriceCache()
+    index = SellerIndex()
+
+    def result(bazaar_data):
+        return pipeline.FetchResult(1, 100, "Item", bazaar_data, [])
+
+    def bazaar():
+        return MarketResponse(1, "Item", 0, 0, 1, [bazaar_listing(50)])
+
+    # 同じ出品 -> Bazaar取得失敗 -> 同じ出品
+    for bazaar_data in (bazaar(), None, bazaar()):
+        pipeline.evaluate(result(bazaar_data), cache, index, set())
+
+    assert index.get(9).below_threshold_count == 1
+    assert 1 in index.get(9).listings
+
+
+def test_prioritize_interleaves_boosted_items():
+    index = SellerIndex()
+    # 2回割安出品した出品者が item 1 を出品中
+    for content_updated in (100, 200):
+        index.update(1, [bazaar_listing(50, content_updated=content_updated)], threshold=100)
+
+    watches = [(item_id, 100) for item_id in range(1, 8)]
+    schedule, boosted = index.prioritize(watches, every=3)
+
+    assert boosted == {1}
+    assert [w[0] for w in schedule] == [1, 2, 3, 4, 1, 5, 6, 7]
+
+
+def test_prioritize_without_boosted_items_keeps_order():
+    watches = [(item_id, 100) for item_id in range(1, 5)]
+    schedule, boosted = SellerIndex().prioritize(watches, every=2)
+    assert boosted == set()
+    assert schedule == watches